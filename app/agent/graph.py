@@ -4,69 +4,49 @@ Converts your SmolAgents workflow to LangGraph state machine.
 """
 from typing import Literal
 from langgraph.graph import StateGraph, END
-from langchain_openai import ChatOpenAI
 
 from app.agent.state import ClaimState
 from app.agent.tools import (
-    parse_claim,
-    is_valid_query,
+    parse_and_validate,
     generate_policy_queries,
     retrieve_policy_text,
     generate_recommendation,
     finalize_decision
 )
+from app.database.vector_store import classify_topics
 from app.utils.logger import logger
 from app.utils.config import config
 
-# Initialize LLM
-llm = ChatOpenAI(
-    model=config.model_name,
-    api_key=config.openai_api_key,
-    base_url=config.openai_base_url,
-    temperature=0
-)
-
 
 # === NODE FUNCTIONS ===
 
-def parse_claim_node(state: ClaimState) -> ClaimState:
-    """Node 1: Parse incoming claim JSON"""
-    logger.info("📍 NODE: parse_claim_node - Starting claim parsing")
-    
-    result = parse_claim.invoke({"claim_json": state["claim_json"]})
-    
-    state["claim_id"] = result.get("claim_id")
-    state["policy_holder"] = result.get("policy_holder")
-    state["vendor_name"] = result.get("vendor_name")
-    state["invoice_items"] = result.get("invoice_items")
-    state["claim_amount"] = result.get("claim_amount")
-    state["current_step"] = "parsed"
-    
-    return state
+def _errors(result: dict) -> list:
+    """Error reported by a tool's fallback result, as an `errors` state update"""
+    return [result["error"]] if result.get("error") else []
 
 
-def validate_claim_node(state: ClaimState) -> ClaimState:
-    """Node 2: Validate claim requirements"""
-    logger.info("📍 NODE: validate_claim_node - Validating claim")
+async def parse_claim_node(state: ClaimState) -> dict:
+    """Node 1: Parse and validate incoming claim JSON"""
+    logger.info("📍 NODE: parse_claim_node - Parsing and validating claim")
     
-    claim_data = {
-        "claim_id": state["claim_id"],
-        "policy_holder": state["policy_holder"],
-        "vendor_name": state["vendor_name"],
-        "claim_amount": state["claim_amount"]
-    }
-    
-    result = is_valid_query.invoke({"claim_data": claim_data})
+    result = await parse_and_validate.ainvoke({"claim": state["claim"]})
     
-    state["is_valid"] = result.get("is_valid", False)
-    state["validation_reason"] = result.get("reason", "")
-    state["current_step"] = "validated"
-    
-    return state
+    return {
+        "claim_id": result.get("claim_id"),
+        "policy_holder": result.get("policy_holder"),
+        "vendor_name": result.get("vendor_name"),
+        "invoice_items": result.get("invoice_items"),
+        "invoice_items_soa": result.get("invoice_items_soa"),
+        "claim_amount": result.get("claim_amount"),
+        "is_valid": result.get("is_valid", False),
+        "validation_reason": result.get("reason", ""),
+        "errors": _errors(result),
+        "current_step": "validated"
+    }
 
 
-def generate_queries_node(state: ClaimState) -> ClaimState:
-    """Node 3: Generate policy search queries"""
+async def generate_queries_node(state: ClaimState) -> dict:
+    """Node 2: Generate policy search queries"""
     logger.info("📍 NODE: generate_queries_node - Generating search queries")
     
     claim_data = {
@@ -75,28 +55,39 @@ def generate_queries_node(state: ClaimState) -> ClaimState:
         "claim_amount": state["claim_amount"]
     }
     
-    queries = generate_policy_queries.invoke({"claim_data": claim_data})
+    result = await generate_policy_queries.ainvoke({"claim_data": claim_data})
     
-    state["policy_queries"] = queries
-    state["current_step"] = "queries_generated"
-    
-    return state
+    return {
+        "policy_queries": result.get("queries", []),
+        "errors": _errors(result),
+        "current_step": "queries_generated"
+    }
 
 
-def retrieve_policy_node(state: ClaimState) -> ClaimState:
-    """Node 4: Retrieve relevant policy text"""
+async def retrieve_policy_node(state: ClaimState) -> dict:
+    """Node 3: Retrieve relevant policy text"""
     logger.info("📍 NODE: retrieve_policy_node - Retrieving policy information")
     
-    policy_text = retrieve_policy_text.invoke({"queries": state["policy_queries"]})
+    # Narrow the vector search to policy topics the claimed items relate to.
+    # The keyword list is short, so if any item maps to no topic the filter
+    # could drop the part that covers it; search unfiltered then.
+    item_topics = [classify_topics(item) for item in state["invoice_items_soa"]["item"]]
+    topics = sorted({topic for matched in item_topics for topic in matched}) if all(item_topics) else []
     
-    state["retrieved_policy_text"] = policy_text
-    state["current_step"] = "policy_retrieved"
+    result = await retrieve_policy_text.ainvoke({
+        "queries": state["policy_queries"],
+        "topics": topics
+    })
     
-    return state
+    return {
+        "retrieved_policy_text": result.get("policy_text", ""),
+        "errors": _errors(result),
+        "current_step": "policy_retrieved"
+    }
 
 
-def recommendation_node(state: ClaimState) -> ClaimState:
-    """Node 5: Generate recommendation"""
+async def recommendation_node(state: ClaimState) -> dict:
+    """Node 4: Generate recommendation"""
     logger.info("📍 NODE: recommendation_node - Generating recommendation")
     
     claim_data = {
@@ -106,69 +97,65 @@ def recommendation_node(state: ClaimState) -> ClaimState:
         "invoice_items": state["invoice_items"]
     }
     
-    result = generate_recommendation.invoke({
+    result = await generate_recommendation.ainvoke({
         "claim_data": claim_data,
         "policy_text": state["retrieved_policy_text"]
     })
     
-    state["recommendation"] = result.get("recommendation")
-    state["recommendation_reasoning"] = result.get("reasoning")
-    state["current_step"] = "recommendation_generated"
-    
-    return state
+    return {
+        "recommendation": result.get("recommendation"),
+        "recommendation_reasoning": result.get("reasoning"),
+        "errors": _errors(result),
+        "current_step": "recommendation_generated"
+    }
 
 
-def price_check_node(state: ClaimState) -> ClaimState:
-    """Node 6: Check for price inflation (simplified)"""
-    logger.info("📍 NODE: price_check_node - Checking prices")
+async def finalize_decision_node(state: ClaimState) -> dict:
+    """Node 5: Check the claim amount, then make final decision"""
+    logger.info("📍 NODE: finalize_decision_node - Finalizing decision")
     
-    # Simplified price check logic
+    # Simplified price check logic (inlined: too cheap to warrant its own node)
     # In production, this would call external pricing APIs
-    claim_amount = state["claim_amount"] or 0
+    amounts = state["invoice_items_soa"]["amount"]
+    # Vectorized total over the amount column; the larger of stated and itemised amount is checked
+    claim_amount = max(state["claim_amount"] or 0, float(amounts.sum()))
     
     if claim_amount > 10000:
-        state["price_check_result"] = "HIGH_AMOUNT_FLAGGED"
+        price_check_result = "HIGH_AMOUNT_FLAGGED"
         logger.warning(f"⚠️ High claim amount: ${claim_amount}")
     else:
-        state["price_check_result"] = "WITHIN_NORMAL_RANGE"
+        price_check_result = "WITHIN_NORMAL_RANGE"
         logger.info(f"✅ Claim amount acceptable: ${claim_amount}")
     
-    state["current_step"] = "price_checked"
-    
-    return state
-
-
-def finalize_decision_node(state: ClaimState) -> ClaimState:
-    """Node 7: Make final decision"""
-    logger.info("📍 NODE: finalize_decision_node - Finalizing decision")
-    
     claim_data = {
         "claim_id": state["claim_id"]
     }
     
-    result = finalize_decision.invoke({
+    result = await finalize_decision.ainvoke({
         "claim_data": claim_data,
         "recommendation": state["recommendation"],
         "recommendation_reasoning": state["recommendation_reasoning"],
-        "price_check_result": state["price_check_result"]
+        "price_check_result": price_check_result
     })
     
-    state["final_decision"] = result.get("final_decision")
-    state["final_reasoning"] = result.get("final_reasoning")
-    state["current_step"] = "completed"
-    
-    return state
+    return {
+        "price_check_result": price_check_result,
+        "final_decision": result.get("final_decision"),
+        "final_reasoning": result.get("final_reasoning"),
+        "errors": _errors(result),
+        "current_step": "completed"
+    }
 
 
-def invalid_claim_node(state: ClaimState) -> ClaimState:
+async def invalid_claim_node(state: ClaimState) -> dict:
     """Terminal node for invalid claims"""
     logger.info("📍 NODE: invalid_claim_node - Claim rejected as invalid")
     
-    state["final_decision"] = "INVALID"
-    state["final_reasoning"] = state["validation_reason"]
-    state["current_step"] = "completed"
-    
-    return state
+    return {
+        "final_decision": "INVALID",
+        "final_reasoning": state["validation_reason"],
+        "current_step": "completed"
+    }
 
 
 # === CONDITIONAL EDGES ===
@@ -193,23 +180,18 @@ def create_claims_processing_graph():
     
     # Add nodes
     workflow.add_node("parse_claim", parse_claim_node)
-    workflow.add_node("validate_claim", validate_claim_node)
     workflow.add_node("generate_queries", generate_queries_node)
     workflow.add_node("retrieve_policy", retrieve_policy_node)
     workflow.add_node("recommendation", recommendation_node)
-    workflow.add_node("price_check", price_check_node)
     workflow.add_node("finalize_decision", finalize_decision_node)
     workflow.add_node("invalid_claim", invalid_claim_node)
     
     # Set entry point
     workflow.set_entry_point("parse_claim")
     
-    # Add edges
-    workflow.add_edge("parse_claim", "validate_claim")
-    
-    # Conditional edge after validation
+    # Conditional edge after the combined parse + validation step
     workflow.add_conditional_edges(
-        "validate_claim",
+        "parse_claim",
         should_continue_after_validation,
         {
             "continue": "generate_queries",
@@ -218,13 +200,13 @@ def create_claims_processing_graph():
     )
     
     workflow.add_edge("generate_queries", "retrieve_policy")
+    
     workflow.add_edge("retrieve_policy", "recommendation")
-    workflow.add_edge("recommendation", "price_check")
-    workflow.add_edge("price_check", "finalize_decision")
+    workflow.add_edge("recommendation", "finalize_decision")
     workflow.add_edge("finalize_decision", END)
     workflow.add_edge("invalid_claim", END)
     
-    # Compile
+    # Compile (run with `await claims_graph.ainvoke(...)`)
     app = workflow.compile()
     
     logger.info("✅ LangGraph workflow compiled successfully")
@@ -234,10 +216,9 @@ def create_claims_processing_graph():
 # Create global graph instance
 claims_graph = create_claims_processing_graph()
 
-# Save the workflow as a PNG for visualization
-png_bytes = claims_graph.get_graph().draw_mermaid_png()
-with open("graph.png", "wb") as f:
-    f.write(png_bytes)
-
-
-
+# Save the workflow as a PNG for visualization. Rendering calls the external
+# Mermaid API, so it is opt-in rather than done on every import.
+if config.render_graph_png or __name__ == "__main__":
+    png_bytes = claims_graph.get_graph().draw_mermaid_png()
+    with open("graph.png", "wb") as f:
+        f.write(png_bytes)
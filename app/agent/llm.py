@@ -0,0 +1,47 @@
+"""Shared chat model for the agent tools, created on first use"""
+from functools import lru_cache
+
+import httpx
+
+from langchain_core.globals import set_llm_cache
+from langchain_core.runnables import Runnable
+from langchain_openai import ChatOpenAI
+from pydantic import BaseModel
+
+from app.utils.logger import logger
+from app.utils.config import config
+from app.utils.llm_cache import SQLiteLLMCache
+
+
+@lru_cache(maxsize=1)
+def get_llm() -> ChatOpenAI:
+    """Return the process-wide ChatOpenAI instance"""
+    logger.info(f"Initializing LLM: {config.model_name}")
+    
+    # Cache deterministic (temperature=0) responses so repeated claims skip the API
+    if config.llm_cache_enabled:
+        set_llm_cache(SQLiteLLMCache(config.llm_cache_path, ttl_seconds=config.llm_cache_ttl))
+    
+    # One keep-alive connection pool per process: every tool reuses the same
+    # TCP/TLS connections, and HTTP/2 multiplexes the requests of concurrent claims.
+    # The async pool is bound to one event loop, so graph runs go through
+    # app.utils.event_loop rather than a fresh asyncio.run() per claim.
+    limits = httpx.Limits(max_keepalive_connections=20)
+    
+    return ChatOpenAI(
+        model=config.model_name,
+        api_key=config.openai_api_key,
+        base_url=config.openai_base_url,
+        temperature=0,
+        http_client=httpx.Client(http2=True, limits=limits),
+        http_async_client=httpx.AsyncClient(http2=True, limits=limits)
+    )
+
+
+@lru_cache(maxsize=None)
+def get_structured_llm(schema: type[BaseModel]) -> Runnable:
+    """
+    Return the shared LLM constrained to the given pydantic schema.
+    Function calling keeps the result in tool_calls, which round-trips through the cache.
+    """
+    return get_llm().with_structured_output(schema, method="function_calling")
@@ -1,18 +1,21 @@
 """State schema for LangGraph workflow"""
-from typing import TypedDict, Optional, List, Dict, Any
+import operator
+from typing import TypedDict, Optional, List, Dict, Any, Annotated
 from pydantic import BaseModel, Field
 
+
 class ClaimState(TypedDict):
     """
     State passed between nodes in the LangGraph workflow.
     Maps directly to your SmolAgents workflow.
     """
     # Input
-    claim_json: str  # Raw claim JSON input
+    claim: Dict[str, Any]  # Raw claim data as submitted
     
     # Parsed claim data
     claim_id: Optional[str]
     invoice_items: Optional[List[Dict[str, Any]]]
+    invoice_items_soa: Optional[Dict[str, Any]]  # {"item": [...], "amount": np.ndarray} for vectorized checks
     vendor_name: Optional[str]
     claim_amount: Optional[float]
     policy_holder: Optional[str]
@@ -36,10 +39,45 @@ class ClaimState(TypedDict):
     final_decision: Optional[str]
     final_reasoning: Optional[str]
     
+    # Tool failures during this run (results with errors are not cached)
+    errors: Annotated[List[str], operator.add]
+    
     # Flow control
     current_step: str  # For logging
 
 # Pydantic models for validation
+class InvoiceItem(BaseModel):
+    """Single line item on a claim invoice"""
+    item: str = Field(..., description="Description of the claimed item or service")
+    amount: float = Field(..., description="Amount claimed for this item")
+
+
+class ParsedClaim(BaseModel):
+    """Structured LLM output for claim parsing"""
+    claim_id: Optional[str] = Field(None, description="The claim identifier")
+    policy_holder: Optional[str] = Field(None, description="Name of the policy holder")
+    vendor_name: Optional[str] = Field(None, description="The service provider/vendor name")
+    invoice_items: List[InvoiceItem] = Field(default_factory=list, description="List of items claimed")
+    claim_amount: Optional[float] = Field(None, description="Total claim amount")
+
+
+class PolicyQueries(BaseModel):
+    """Structured LLM output for policy search query generation"""
+    queries: List[str] = Field(..., description="2-3 specific policy search queries")
+
+
+class Recommendation(BaseModel):
+    """Structured LLM output for the claim recommendation"""
+    recommendation: str = Field(..., description="APPROVE or DENY")
+    reasoning: str = Field(..., description="Detailed explanation based on policy")
+
+
+class FinalDecision(BaseModel):
+    """Structured LLM output for the final claim decision"""
+    final_decision: str = Field(..., description="APPROVED, DENIED or REQUIRES_REVIEW")
+    final_reasoning: str = Field(..., description="Comprehensive explanation")
+
+
 class ClaimInput(BaseModel):
     """User-submitted claim structure"""
     claim_id: str = Field(..., description="Unique claim identifier")
@@ -2,117 +2,92 @@
 LangChain tools converted from your SmolAgents tools.
 Maps 1:1 with your existing workflow.
 """
+import asyncio
 import json
-import re
-from typing import Dict, Any, List
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+from langchain_core.prompts import PromptTemplate
+from langchain_core.runnables import Runnable
 from langchain_core.tools import tool
-from langchain_openai import ChatOpenAI
+from pydantic import BaseModel
 
 from app.utils.logger import logger
-from app.utils.config import config
-from app.database.vector_store import policy_store
+from app.database.vector_store import get_policy_store, BASE_TOPICS
+from app.agent.llm import get_structured_llm
+from app.agent.state import ParsedClaim, PolicyQueries, Recommendation, FinalDecision
 from app.agent.prompts import (
     PARSE_CLAIM_PROMPT,
-    VALIDATE_CLAIM_PROMPT,
     GENERATE_POLICY_QUERIES_PROMPT,
     GENERATE_RECOMMENDATION_PROMPT,
     FINALIZE_DECISION_PROMPT
 )
 
-# Initialize LLM
-llm = ChatOpenAI(
-    model=config.model_name,
-    api_key=config.openai_api_key,
-    base_url=config.openai_base_url,
-    temperature=0
-)
 
-def extract_json(text: str) -> Dict[str, Any]:
-    """Extract JSON from LLM response that might contain markdown or extra text"""
-    try:
-        # Try direct JSON parse first
-        return json.loads(text)
-    except json.JSONDecodeError:
-        # Try to find JSON in markdown code blocks
-        json_match = re.search(r'```(?:json)?\s*(\{.*?\}|\[.*?\])\s*```', text, re.DOTALL)
-        if json_match:
-            return json.loads(json_match.group(1))
-        
-        # Try to find JSON object/array in text
-        json_match = re.search(r'(\{.*?\}|\[.*?\])', text, re.DOTALL)
-        if json_match:
-            return json.loads(json_match.group(1))
-        
-        raise ValueError(f"Could not extract JSON from: {text}")
+@lru_cache(maxsize=None)
+def structured_chain(template: str, schema: type[BaseModel]) -> Runnable:
+    """Prompt template (parsed once) piped into the LLM constrained to `schema`"""
+    return PromptTemplate.from_template(template) | get_structured_llm(schema)
 
 
-@tool
-def parse_claim(claim_json: str) -> Dict[str, Any]:
-    """
-    Parse incoming claim JSON and extract key information.
-    
-    Args:
-        claim_json: Raw claim data as JSON string
-    
-    Returns:
-        Parsed claim data with claim_id, policy_holder, vendor_name, invoice_items, claim_amount
-    """
-    logger.info(f"🔧 TOOL: parse_claim - Processing claim")
+def invoice_items_to_soa(items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Column layout of invoice items: descriptions list plus a float64 amount array"""
+    return {
+        "item": [i["item"] for i in items],
+        "amount": np.fromiter((i["amount"] for i in items), dtype=np.float64, count=len(items))
+    }
+
+
+def validate_claim(claim_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Deterministic claim validity rules (no LLM call needed)"""
+    missing = [key for key in ("claim_id", "policy_holder", "vendor_name") if not claim_data.get(key)]
+    if missing:
+        return {"is_valid": False, "reason": f"Missing required fields: {', '.join(missing)}"}
     
-    try:
-        prompt = PARSE_CLAIM_PROMPT.format(claim_json=claim_json)
-        response = llm.invoke(prompt)
-        parsed_data = extract_json(response.content)
-        
-        logger.info(f"✅ Parsed claim ID: {parsed_data.get('claim_id', 'N/A')}")
-        return parsed_data
+    if (claim_data.get("claim_amount") or 0) <= 0:
+        return {"is_valid": False, "reason": "Claim amount must be greater than 0"}
     
-    except Exception as e:
-        logger.error(f"❌ Error parsing claim: {e}")
-        return {"error": str(e)}
+    return {"is_valid": True, "reason": ""}
 
 
 @tool
-def is_valid_query(claim_data: Dict[str, Any]) -> Dict[str, Any]:
+async def parse_and_validate(claim: Dict[str, Any]) -> Dict[str, Any]:
     """
-    Validate if the claim meets basic requirements.
+    Parse incoming claim JSON with the LLM, then validate it in Python.
     
     Args:
-        claim_data: Parsed claim data
+        claim: Raw claim data as submitted
     
     Returns:
-        {"is_valid": bool, "reason": str}
+        Parsed claim data with claim_id, policy_holder, vendor_name, invoice_items,
+        claim_amount, plus {"is_valid": bool, "reason": str}
     """
-    logger.info(f"🔧 TOOL: is_valid_query - Validating claim")
+    logger.info(f"🔧 TOOL: parse_and_validate - Processing claim")
     
     try:
-        prompt = VALIDATE_CLAIM_PROMPT.format(
-            claim_id=claim_data.get("claim_id", "N/A"),
-            policy_holder=claim_data.get("policy_holder", "N/A"),
-            vendor_name=claim_data.get("vendor_name", "N/A"),
-            claim_amount=claim_data.get("claim_amount", 0)
-        )
+        chain = structured_chain(PARSE_CLAIM_PROMPT, ParsedClaim)
+        # Serialized only here, where the prompt needs text
+        parsed = await chain.ainvoke({"claim_json": json.dumps(claim)})
+        parsed_data = parsed.model_dump()
+        parsed_data["invoice_items_soa"] = invoice_items_to_soa(parsed_data["invoice_items"])
         
-        response = llm.invoke(prompt)
-        validation_result = extract_json(response.content)
-        
-        is_valid = validation_result.get("is_valid", False)
-        reason = validation_result.get("reason", "")
+        logger.info(f"✅ Parsed claim ID: {parsed_data.get('claim_id', 'N/A')}")
+        parsed_data.update(validate_claim(parsed_data))
         
-        if is_valid:
+        if parsed_data["is_valid"]:
             logger.info("✅ Claim is VALID")
         else:
-            logger.warning(f"⚠️ Claim is INVALID: {reason}")
+            logger.warning(f"⚠️ Claim is INVALID: {parsed_data['reason']}")
         
-        return validation_result
+        return parsed_data
     
     except Exception as e:
-        logger.error(f"❌ Error validating claim: {e}")
-        return {"is_valid": False, "reason": f"Validation error: {str(e)}"}
+        logger.error(f"❌ Error parsing claim: {e}")
+        return {"error": str(e), "is_valid": False, "reason": f"Parsing error: {str(e)}"}
 
 
 @tool
-def generate_policy_queries(claim_data: Dict[str, Any]) -> List[str]:
+async def generate_policy_queries(claim_data: Dict[str, Any]) -> Dict[str, Any]:
     """
     Generate search queries to retrieve relevant policy information.
     
@@ -120,68 +95,91 @@ def generate_policy_queries(claim_data: Dict[str, Any]) -> List[str]:
         claim_data: Parsed claim data
     
     Returns:
-        List of search query strings
+        {"queries": List[str]}
     """
     logger.info(f"🔧 TOOL: generate_policy_queries - Creating search queries")
     
     try:
-        prompt = GENERATE_POLICY_QUERIES_PROMPT.format(
-            vendor_name=claim_data.get("vendor_name", "N/A"),
-            invoice_items=json.dumps(claim_data.get("invoice_items", [])),
-            claim_amount=claim_data.get("claim_amount", 0)
-        )
-        
-        response = llm.invoke(prompt)
-        queries = extract_json(response.content)
-        
-        if isinstance(queries, dict):
-            queries = queries.get("queries", [])
+        chain = structured_chain(GENERATE_POLICY_QUERIES_PROMPT, PolicyQueries)
+        result = await chain.ainvoke({
+            "vendor_name": claim_data.get("vendor_name", "N/A"),
+            "invoice_items": json.dumps(claim_data.get("invoice_items", [])),
+            "claim_amount": claim_data.get("claim_amount", 0)
+        })
+        queries = result.queries
         
         logger.info(f"✅ Generated {len(queries)} policy queries")
         for i, q in enumerate(queries, 1):
             logger.info(f"   Query {i}: {q}")
         
-        return queries
+        return {"queries": queries}
     
     except Exception as e:
         logger.error(f"❌ Error generating queries: {e}")
-        return []
+        return {"queries": [], "error": str(e)}
+
+
+@lru_cache(maxsize=4096)
+def _cached_retrieve(queries: Tuple[str, ...], topics: Tuple[str, ...], store_version: int) -> Dict[str, Tuple[Tuple[str, str], ...]]:
+    """
+    (chunk_id, text) matches per query for a (sorted) query set. Retrieval is
+    read-only, so results are memoized until the store version changes on the next ingest.
+    """
+    # Only search policy parts relevant to the claim (plus those that always apply)
+    where = {"topic": {"$in": sorted(set(topics) | set(BASE_TOPICS))}} if topics else None
+    results = get_policy_store().retrieve_batch(list(queries), top_k=3, where=where)
+    return {query: tuple(query_results) for query, query_results in zip(queries, results)}
 
 
 @tool
-def retrieve_policy_text(queries: List[str]) -> str:
+async def retrieve_policy_text(queries: List[str], topics: Optional[List[str]] = None) -> Dict[str, Any]:
     """
     Retrieve relevant policy text from vector store using generated queries.
     
     Args:
         queries: List of search queries
+        topics: Policy topics inferred from the claim; restricts the search when given
     
     Returns:
-        Combined relevant policy text
+        {"policy_text": str} with the combined relevant policy text
     """
     logger.info(f"🔧 TOOL: retrieve_policy_text - Retrieving from vector store")
     
     try:
-        all_results = []
-        
         for query in queries:
             logger.info(f"   Searching for: {query[:60]}...")
-            result = policy_store.retrieve(query, top_k=3)
-            if result:
-                all_results.append(result)
         
-        combined_text = "\n\n---\n\n".join(all_results)
+        # The cache key is sorted so the same query set hits regardless of order
+        store = get_policy_store()
+        results = await asyncio.to_thread(
+            _cached_retrieve,
+            tuple(sorted(set(queries))),
+            tuple(sorted(topics or [])),
+            store.version
+        )
+        
+        # The same policy chunk often matches several queries; keep the first
+        # occurrence of each chunk id (in the original query/rank order, which
+        # decides what survives prompt truncation) so the recommendation prompt
+        # doesn't spend tokens on repeats
+        unique_chunks = {}
+        for query in queries:
+            for chunk_id, text in results[query]:
+                unique_chunks.setdefault(chunk_id, text)
+        
+        logger.info(f"   {len(unique_chunks)} unique chunks after de-duplication")
+        combined_text = "\n\n---\n\n".join(unique_chunks.values())
         
         logger.info(f"✅ Retrieved {len(combined_text)} characters of policy text")
-        return combined_text
+        return {"policy_text": combined_text}
     
     except Exception as e:
         logger.error(f"❌ Error retrieving policy text: {e}")
-        return ""
+        return {"policy_text": "", "error": str(e)}
 
 
 @tool
-def generate_recommendation(claim_data: Dict[str, Any], policy_text: str) -> Dict[str, Any]:
+async def generate_recommendation(claim_data: Dict[str, Any], policy_text: str) -> Dict[str, Any]:
     """
     Generate claim approval/denial recommendation based on policy.
     
@@ -195,16 +193,15 @@ def generate_recommendation(claim_data: Dict[str, Any], policy_text: str) -> Dic
     logger.info(f"🔧 TOOL: generate_recommendation - Analyzing claim")
     
     try:
-        prompt = GENERATE_RECOMMENDATION_PROMPT.format(
-            claim_id=claim_data.get("claim_id", "N/A"),
-            vendor_name=claim_data.get("vendor_name", "N/A"),
-            claim_amount=claim_data.get("claim_amount", 0),
-            invoice_items=json.dumps(claim_data.get("invoice_items", [])),
-            policy_text=policy_text[:2000]  # Limit context size
-        )
-        
-        response = llm.invoke(prompt)
-        recommendation = extract_json(response.content)
+        chain = structured_chain(GENERATE_RECOMMENDATION_PROMPT, Recommendation)
+        result = await chain.ainvoke({
+            "claim_id": claim_data.get("claim_id", "N/A"),
+            "vendor_name": claim_data.get("vendor_name", "N/A"),
+            "claim_amount": claim_data.get("claim_amount", 0),
+            "invoice_items": json.dumps(claim_data.get("invoice_items", [])),
+            "policy_text": policy_text[:2000]  # Limit context size
+        })
+        recommendation = result.model_dump()
         
         rec_decision = recommendation.get("recommendation", "UNKNOWN")
         logger.info(f"✅ Recommendation: {rec_decision}")
@@ -213,11 +210,11 @@ def generate_recommendation(claim_data: Dict[str, Any], policy_text: str) -> Dic
     
     except Exception as e:
         logger.error(f"❌ Error generating recommendation: {e}")
-        return {"recommendation": "ERROR", "reasoning": str(e)}
+        return {"recommendation": "ERROR", "reasoning": str(e), "error": str(e)}
 
 
 @tool
-def finalize_decision(
+async def finalize_decision(
     claim_data: Dict[str, Any],
     recommendation: str,
     recommendation_reasoning: str,
@@ -238,15 +235,14 @@ def finalize_decision(
     logger.info(f"🔧 TOOL: finalize_decision - Making final decision")
     
     try:
-        prompt = FINALIZE_DECISION_PROMPT.format(
-            claim_id=claim_data.get("claim_id", "N/A"),
-            recommendation=recommendation,
-            recommendation_reasoning=recommendation_reasoning,
-            price_check_result=price_check_result
-        )
-        
-        response = llm.invoke(prompt)
-        final_decision = extract_json(response.content)
+        chain = structured_chain(FINALIZE_DECISION_PROMPT, FinalDecision)
+        result = await chain.ainvoke({
+            "claim_id": claim_data.get("claim_id", "N/A"),
+            "recommendation": recommendation,
+            "recommendation_reasoning": recommendation_reasoning,
+            "price_check_result": price_check_result
+        })
+        final_decision = result.model_dump()
         
         decision = final_decision.get("final_decision", "UNKNOWN")
         logger.info(f"✅ FINAL DECISION: {decision}")
@@ -255,4 +251,4 @@ def finalize_decision(
     
     except Exception as e:
         logger.error(f"❌ Error finalizing decision: {e}")
-        return {"final_decision": "ERROR", "final_reasoning": str(e)}
+        return {"final_decision": "ERROR", "final_reasoning": str(e), "error": str(e)}
@@ -1,4 +1,4 @@
 """Database module - Vector store for policy documents"""
-from app.database.vector_store import policy_store
+from app.database.vector_store import get_policy_store
 
-__all__ = ["policy_store"]
+__all__ = ["get_policy_store"]
@@ -1,15 +1,89 @@
 """ChromaDB vector store with OpenAI embeddings"""
+import hashlib
+import re
 import chromadb
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from chromadb.config import Settings
 from chromadb.utils import embedding_functions
-from typing import List, Dict, Any, Optional
-import PyPDF2
+from typing import List, Dict, Any, Optional, Tuple
+import pymupdf
 from pathlib import Path
 import os
 
 from app.utils.config import config
 from app.utils.logger import logger
 
+# Ingestion: chunks per embedding request / concurrent embedding requests
+INGEST_BATCH_SIZE = 100
+INGEST_WORKERS = 4
+
+# Part of the stored PDF fingerprint; bump when chunking or tagging changes
+# so already-ingested PDFs are re-ingested
+INGEST_FORMAT = "2"
+
+# Upper-case part headings in the policy, e.g. "PART D COVERAGE FOR DAMAGE TO YOUR AUTO"
+# or "B. PART D. EXCLUSIONS". A heading starts a sentence and is followed by its title,
+# which rules out table-of-contents entries ("... 1 PART A") and cross-references
+# ("under PART A is").
+PART_HEADING = re.compile(r"(?:^|(?<=[.:] ))PART ([A-F])(?:\.| [-–])? (?=[A-Z][A-Z/]+\b)")
+
+# Every endorsement opens with this notice; endorsements amend different parts,
+# so the section carried over from the previous one no longer applies
+ENDORSEMENT_START = re.compile(r"THIS ENDORSEMENT DOES NOT APPLY UNLESS")
+
+# Any mention of a part ("Part D of this policy", "apply to PART D., also").
+# Endorsements often name the part they amend only this way.
+PART_REFERENCE = re.compile(r"\bPART ([A-F])\b", re.IGNORECASE)
+
+# Retrieval topic for each policy part (stored as chunk metadata)
+SECTION_TOPICS = {
+    "PART A": "liability",
+    "PART B": "medical",
+    "PART C": "uninsured_motorist",
+    "PART D": "vehicle_damage",
+    "PART E": "claim_duties",
+    "PART F": "general",
+}
+
+# Topics whose policy text applies to every claim
+BASE_TOPICS = ("claim_duties", "general")
+
+# Keywords that tie a claimed item to a policy topic
+TOPIC_KEYWORDS = {
+    "vehicle_damage": (
+        "repair", "collision", "damage", "bumper", "body", "paint", "dent", "glass",
+        "windshield", "tire", "brake", "engine", "transmission", "oil", "battery",
+        "alignment", "rotation", "parts", "labor", "tow", "rental", "vehicle", "auto"
+    ),
+    "medical": (
+        "medical", "injury", "injuries", "hospital", "ambulance", "doctor", "physician", "clinic",
+        "therapy", "x-ray", "whiplash", "treatment", "funeral"
+    ),
+    "liability": ("liability", "third party", "third-party", "property damage", "legal", "lawsuit"),
+    "uninsured_motorist": ("uninsured", "underinsured", "hit and run", "hit-and-run"),
+}
+
+# Whole-word matchers with simple inflections ("tires", "towing"), so "dent"
+# does not match "accident" nor "tow" match "towel"
+TOPIC_PATTERNS = {
+    topic: re.compile(r"\b(?:" + "|".join(map(re.escape, keywords)) + r")(?:s|es|ed|ing)?\b")
+    for topic, keywords in TOPIC_KEYWORDS.items()
+}
+
+
+def classify_topics(text: str) -> List[str]:
+    """Policy topics a claim description touches, based on keyword matches"""
+    text = text.lower()
+    return [topic for topic, pattern in TOPIC_PATTERNS.items() if pattern.search(text)]
+
+
+def policy_chunk_id(chunk: Dict[str, Any]) -> str:
+    """Stable id for a policy chunk: its source file plus a hash of its content and tags"""
+    content = "\0".join(str(chunk[key]) for key in ("page", "section", "topic", "text"))
+    return f"{Path(chunk['source']).name}:{hashlib.sha256(content.encode('utf-8')).hexdigest()[:16]}"
+
+
 class PolicyVectorStore:
     """Manages ChromaDB collection for insurance policy documents"""
     
@@ -33,9 +107,21 @@ class PolicyVectorStore:
         self.collection = self.client.get_or_create_collection(
             name=config.chroma_collection_name,
             embedding_function=self.embedding_function,  # ✅ ChromaDB handles embeddings automatically
-            metadata={"description": "Insurance policy documents"}
+            metadata={
+                "description": "Insurance policy documents",
+                # HNSW index tuning (applied when the collection is first created):
+                # cosine matches the normalized OpenAI embeddings, M/construction_ef
+                # build a denser graph once at ingest, search_ef bounds query work
+                "hnsw:space": "cosine",
+                "hnsw:M": 32,
+                "hnsw:construction_ef": 200,
+                "hnsw:search_ef": 64
+            }
         )
         
+        # Bumped whenever the collection contents change; part of retrieval cache keys
+        self.version = 0
+        
         logger.info(f"ChromaDB collection '{config.chroma_collection_name}' ready")
         logger.info(f"Current document count: {self.collection.count()}")
     
@@ -49,24 +135,51 @@ class PolicyVectorStore:
         
         chunks = []
         try:
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                logger.info(f"PDF has {len(pdf_reader.pages)} pages")
+            # PyMuPDF extracts text natively (C) and is much faster than pure-Python parsers
+            with pymupdf.open(pdf_path) as doc:
+                logger.info(f"PDF has {len(doc)} pages")
+                pages_text = [page.get_text() for page in doc]
+            
+            # Split into smaller chunks (500 chars with 50 char overlap)
+            chunk_size = 500
+            overlap = 50
+            step = chunk_size - overlap
+            
+            # Policy part the current chunk belongs to; carried across pages
+            # within the main policy and within a single endorsement
+            section = "GENERAL"
+            in_endorsement = False
+            
+            for page_num, page_text in enumerate(pages_text, 1):
+                # Collapse whitespace once per page so chunks need no strip()
+                text = " ".join(page_text.split())
+                # Section changes on this page as (position, kind, section), in text order
+                events = sorted(
+                    [(m.start(), "heading", f"PART {m.group(1)}") for m in PART_HEADING.finditer(text)]
+                    + [(m.start(), "endorsement", "GENERAL") for m in ENDORSEMENT_START.finditer(text)]
+                    + [(m.start(), "reference", f"PART {m.group(1).upper()}") for m in PART_REFERENCE.finditer(text)]
+                )
                 
-                for page_num, page in enumerate(pdf_reader.pages, 1):
-                    text = page.extract_text()
-                    # Split into smaller chunks (500 chars with 50 char overlap)
-                    chunk_size = 500
-                    overlap = 50
-                    
-                    for i in range(0, len(text), chunk_size - overlap):
-                        chunk = text[i:i + chunk_size]
-                        if len(chunk.strip()) > 50:
-                            chunks.append({
-                                "text": chunk.strip(),
-                                "page": page_num,
-                                "source": pdf_path
-                            })
+                for i in range(0, len(text), step):
+                    chunk = text[i:i + chunk_size]
+                    # A chunk belongs to the last section change that starts inside or before it
+                    while events and events[0][0] < i + chunk_size:
+                        _, kind, part = events.pop(0)
+                        if kind == "endorsement":
+                            section, in_endorsement = part, True
+                        elif kind == "heading":
+                            section = part
+                        elif in_endorsement and section == "GENERAL":
+                            # The first part an endorsement mentions is the one it amends
+                            section = part
+                    if len(chunk) > 50:
+                        chunks.append({
+                            "text": chunk,
+                            "page": page_num,
+                            "source": pdf_path,
+                            "section": section,
+                            "topic": SECTION_TOPICS.get(section, "general")
+                        })
             
             logger.info(f"Extracted {len(chunks)} chunks from PDF")
             return chunks
@@ -79,45 +192,121 @@ class PolicyVectorStore:
         """Load policy PDF into vector store"""
         pdf_path = pdf_path or config.policy_pdf_path
         
-        # Check if already populated
-        if self.collection.count() > 0:
+        if not Path(pdf_path).exists():
+            logger.error(f"Policy PDF not found: {pdf_path}")
+            return
+        
+        # One canonical form of the path for chunk sources and the fingerprint key,
+        # so "data/policy.pdf" and "./data/policy.pdf" are the same document
+        source = str(Path(pdf_path).resolve())
+        
+        # Cheap check first: the collection records the fingerprint of each PDF
+        # it fully ingested, so an unchanged PDF is not parsed again
+        fingerprint = f"{INGEST_FORMAT}:{hashlib.sha256(Path(source).read_bytes()).hexdigest()}"
+        fingerprint_key = f"sha256:{source}"
+        collection_metadata = self.collection.metadata or {}
+        if collection_metadata.get(fingerprint_key) == fingerprint:
             logger.info("Collection already populated. Skipping.")
             return
         
-        chunks = self.load_pdf_policy(pdf_path)
+        chunks = self.load_pdf_policy(source)
         if not chunks:
             logger.warning("No chunks extracted from PDF")
             return
         
-        logger.info("Adding chunks to vector store (embeddings generated automatically)")
+        # Ids come from the source and chunk content, so an edited PDF replaces
+        # its old chunks instead of overwriting them by position.
+        # Chunks stored under the path as given (before paths were resolved) count too.
+        chunks_by_id = {policy_chunk_id(chunk): chunk for chunk in chunks}
+        existing = self.collection.get(where={"source": {"$in": sorted({source, pdf_path})}}, include=["metadatas"])
         
-        # ✅ ChromaDB automatically generates embeddings when we add documents
-        self.collection.add(
-            documents=[chunk["text"] for chunk in chunks],  # No manual embeddings needed!
-            metadatas=[{"page": c["page"], "source": c["source"]} for c in chunks],
-            ids=[f"chunk_{i}" for i in range(len(chunks))]
-        )
+        # Chunks of an earlier version of this PDF (or older id schemes) are stale
+        stale_ids = sorted(set(existing["ids"]) - chunks_by_id.keys())
+        if stale_ids:
+            logger.info(f"Deleting {len(stale_ids)} stale chunks of {source}")
+            self.collection.delete(ids=stale_ids)
         
-        logger.info(f"Successfully added {len(chunks)} chunks to vector store")
+        # Only chunks missing from the collection (or stored under another form
+        # of the path) are embedded, so an interrupted ingest resumes where it stopped
+        current_ids = {
+            chunk_id for chunk_id, metadata in zip(existing["ids"], existing["metadatas"])
+            if metadata["source"] == source
+        }
+        pending = [(chunk_id, chunk) for chunk_id, chunk in chunks_by_id.items() if chunk_id not in current_ids]
+        
+        batches = [pending[start:start + INGEST_BATCH_SIZE] for start in range(0, len(pending), INGEST_BATCH_SIZE)]
+        logger.info(f"Adding {len(pending)} chunks to vector store in {len(batches)} batches")
+        
+        def embed(batch):
+            return self.embedding_function([chunk["text"] for _, chunk in batch])
+        
+        # Embedding requests are network-bound, so several run concurrently;
+        # each batch is upserted as soon as its embeddings arrive
+        with ThreadPoolExecutor(max_workers=INGEST_WORKERS) as executor:
+            for batch, embeddings in zip(batches, executor.map(embed, batches)):
+                self.collection.upsert(
+                    ids=[chunk_id for chunk_id, _ in batch],
+                    embeddings=embeddings,
+                    documents=[chunk["text"] for _, chunk in batch],
+                    metadatas=[
+                        {key: chunk[key] for key in ("page", "source", "section", "topic")}
+                        for _, chunk in batch
+                    ]
+                )
+                logger.info(f"Upserted batch of {len(batch)} chunks")
+        
+        # Recorded only after every batch landed; index settings (hnsw:*) can't be
+        # passed to modify() and are kept by the collection regardless
+        # A fingerprint recorded under the unresolved path is replaced
+        self.collection.modify(metadata={
+            **{
+                key: value for key, value in collection_metadata.items()
+                if not key.startswith("hnsw:") and key != f"sha256:{pdf_path}"
+            },
+            fingerprint_key: fingerprint
+        })
+        
+        self.version += 1
+        logger.info(f"Successfully added {len(pending)} chunks to vector store")
     
-    def retrieve(self, query: str, top_k: int = 5) -> str:
-        """Retrieve relevant policy text for a query"""
-        logger.info(f"Retrieving policy text for query: {query[:100]}...")
+    def retrieve_batch(
+        self,
+        queries: List[str],
+        top_k: int = 5,
+        where: Optional[Dict[str, Any]] = None
+    ) -> List[List[Tuple[str, str]]]:
+        """
+        Retrieve relevant policy chunks for several queries in a single query call.
+        `where` is a Chroma metadata filter (e.g. on "topic") that narrows the ANN search.
+        """
+        if not queries:
+            return []
         
-        # ✅ ChromaDB automatically embeds the query using the same model
+        logger.info(f"Retrieving policy text for {len(queries)} queries in one batch (filter: {where})")
+        
+        # ✅ One call embeds all queries together and runs every ANN search
         results = self.collection.query(
-            query_texts=[query],  # Just pass the text - no manual embedding!
-            n_results=top_k
+            query_texts=queries,
+            n_results=top_k,
+            where=where
         )
         
-        if not results['documents'] or not results['documents'][0]:
-            logger.warning("No relevant policy documents found")
-            return ""
+        # Chunks ingested before topic tagging have no "topic" metadata
+        if where and not any(results['ids']):
+            logger.warning("No chunks matched the metadata filter; retrying unfiltered")
+            results = self.collection.query(
+                query_texts=queries,
+                n_results=top_k
+            )
         
-        retrieved_text = "\n\n".join(results['documents'][0])
-        logger.info(f"Retrieved {len(results['documents'][0])} relevant chunks")
+        # One list of (chunk_id, text) pairs per query, in query order
+        retrieved = [list(zip(ids, documents)) for ids, documents in zip(results['ids'], results['documents'])]
+        logger.info(f"Retrieved {sum(len(chunks) for chunks in retrieved)} relevant chunks")
         
-        return retrieved_text
+        return retrieved
+
 
-# Global vector store instance
-policy_store = PolicyVectorStore()
+@lru_cache(maxsize=1)
+def get_policy_store() -> PolicyVectorStore:
+    """Return the process-wide vector store, opening ChromaDB on first use"""
+    return PolicyVectorStore()
@@ -4,63 +4,74 @@ Allows users to write or upload claim details
 """
 import streamlit as st
 import json
-import sys
 import logging
+import logging.handlers
 import io
-from datetime import datetime
+import queue
+import uuid
+from collections import OrderedDict, deque
 from pathlib import Path
+from typing import Optional
 
-# Add parent directory to Python path
-parent_dir = Path(__file__).resolve().parent.parent
-sys.path.insert(0, str(parent_dir))
-
-# Initialize app components
-from app.agent.graph import claims_graph
-from app.database.vector_store import policy_store
-from app.utils.logger import logger
+# Initialize app components (LangGraph/Chroma are imported lazily by the factories below)
+from app.utils.logger import logger, current_execution_logs
 from app.utils.config import config
+from app.utils import event_loop, json_utils
 
 
-# Custom log handler for Streamlit display
-class StreamlitLogHandler(logging.Handler):
-    """Log handler that stores messages in session state for UI display"""
-    def emit(self, record):
-        log_entry = self.format(record)
-        # Get current execution ID
-        execution_id = st.session_state.get("current_execution_id")
-        if execution_id:
-            if "execution_logs" not in st.session_state:
-                st.session_state.execution_logs = {}
-            if execution_id not in st.session_state.execution_logs:
-                st.session_state.execution_logs[execution_id] = []
-            # Avoid repeating the same log entry consecutively
-            exec_list = st.session_state.execution_logs[execution_id]
-            if not exec_list or exec_list[-1] != log_entry:
-                exec_list.append(log_entry)
-                st.session_state.execution_logs[execution_id] = exec_list
-
-
-# Add Streamlit handler to logger
-if not any(isinstance(h, StreamlitLogHandler) for h in logger.handlers):
-    streamlit_handler = StreamlitLogHandler()
-    formatter = logging.Formatter(
-        "[%(asctime)s] [%(levelname)s] [%(module)s] - %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S"
-    )
-    streamlit_handler.setFormatter(formatter)
-    logger.addHandler(streamlit_handler)
+# Heavy singletons: built once per server process and shared by all sessions/reruns
+@st.cache_resource
+def get_claims_graph():
+    """Compiled LangGraph workflow"""
+    from app.agent.graph import claims_graph
+    return claims_graph
 
 
-# Page configuration
-st.set_page_config(
-    page_title="Insurance Claims Processing Agent",
-    page_icon="🏥",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
+@st.cache_resource
+def get_policy_store():
+    """ChromaDB client/collection and embedding client"""
+    from app.database.vector_store import get_policy_store as get_store
+    return get_store()
+
+
+@st.cache_resource(show_spinner=False)
+def _vector_store_ready(pdf_path: str) -> bool:
+    """Ingest the policy PDF once per path for the whole process (all sessions)"""
+    get_policy_store().populate_from_pdf(pdf_path)
+    logger.info("Vector store initialized successfully")
+    return True
+
+
+@st.cache_data(ttl=30)
+def _policy_doc_count() -> int:
+    """Collection size for the sidebar; refreshed at most every 30s"""
+    return get_policy_store().collection.count()
+
+
+@st.cache_data(ttl=5)
+def _list_logs() -> list:
+    """Log file names in ./logs; rescanned at most every 5s"""
+    return sorted(p.name for p in Path("logs").iterdir() if p.is_file())
+
+
+@st.cache_data(ttl=5, max_entries=8)
+def _read_log(name: str) -> str:
+    """Contents of one log file; re-read at most every 5s"""
+    return (Path("logs") / name).read_text(encoding="utf-8", errors="replace")
+
+
+# Most recent log lines kept per execution, and executions kept per session
+MAX_LOG_LINES = 5000
+MAX_EXECUTIONS = 5
+
+# Characters of a log file rendered in the Logs Viewer
+MAX_LOG_DISPLAY_CHARS = 200_000
+
+# Separator around each claim's log output
+_BANNER = "=" * 80
 
 # Custom CSS
-st.markdown("""
+_CSS = """
 <style>
     .main-header {
         font-size: 2.5rem;
@@ -91,7 +102,76 @@ st.markdown("""
         color: #856404;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+
+# Custom log handler for Streamlit display
+class ExecutionLogFilter(logging.Filter):
+    """Tag each record with the current execution's log buffer when it is emitted"""
+    def filter(self, record):
+        record.execution_logs = current_execution_logs.get()
+        return True
+
+
+class StreamlitLogHandler(logging.Handler):
+    """Log handler that stores messages in session state for UI display"""
+    def emit(self, record):
+        # Bounded deque created by start_execution; appended in place
+        exec_logs = getattr(record, "execution_logs", None)
+        if exec_logs is None:
+            return
+        log_entry = self.format(record)
+        # Avoid repeating the same log entry consecutively
+        if exec_logs and exec_logs[-1] == log_entry:
+            return
+        exec_logs.append(log_entry)
+
+
+@st.cache_resource(show_spinner=False)
+def _install_streamlit_handler() -> logging.handlers.MemoryHandler:
+    """
+    Add Streamlit handler to logger (once per process), behind a MemoryHandler so
+    records reach the UI in bursts (every 200 records, on ERROR, or when an execution ends)
+    """
+    streamlit_handler = StreamlitLogHandler()
+    formatter = logging.Formatter(
+        "[%(asctime)s] [%(levelname)s] [%(module)s] - %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S"
+    )
+    streamlit_handler.setFormatter(formatter)
+    
+    memory_handler = logging.handlers.MemoryHandler(
+        capacity=200,
+        flushLevel=logging.ERROR,
+        target=streamlit_handler,
+        flushOnClose=True
+    )
+    # Records are flushed later, so bind them to their execution while buffering
+    memory_handler.addFilter(ExecutionLogFilter())
+    
+    # "Clear cache" re-runs this function; drop the handler installed last time.
+    # Matched by class name because every rerun redefines StreamlitLogHandler.
+    for handler in list(logger.handlers):
+        if (isinstance(handler, logging.handlers.MemoryHandler)
+                and type(handler.target).__name__ == "StreamlitLogHandler"):
+            logger.removeHandler(handler)
+            handler.close()
+    
+    logger.addHandler(memory_handler)
+    return memory_handler
+
+
+log_buffer = _install_streamlit_handler()
+
+
+# Page configuration
+st.set_page_config(
+    page_title="Insurance Claims Processing Agent",
+    page_icon="🏥",
+    layout="wide",
+    initial_sidebar_state="expanded"
+)
+
 
 
 def initialize_vector_store():
@@ -99,14 +179,9 @@ def initialize_vector_store():
     if st.session_state.get("vector_store_initialized"):
         return
     
+    # Failures propagate as a single error banner and are retried on the next rerun
     with st.spinner("🔄 Loading policy documents into vector store..."):
-        try:
-            policy_store.populate_from_pdf()
-            st.session_state.vector_store_initialized = True
-            logger.info("Vector store initialized successfully")
-        except Exception as e:
-            st.error(f"Error initializing vector store: {e}")
-            logger.error(f"Vector store initialization failed: {e}")
+        st.session_state.vector_store_initialized = _vector_store_ready(config.policy_pdf_path)
 
 
 def display_logs():
@@ -122,59 +197,213 @@ def display_logs():
 
 def start_execution():
     """Start a new execution and create a unique execution ID"""
-    import uuid
     execution_id = str(uuid.uuid4())
     st.session_state.current_execution_id = execution_id
-    # Reset execution_logs so only this execution's logs are kept
-    st.session_state.execution_logs = {}
-    st.session_state.execution_logs[execution_id] = []
+    # Keep logs for the most recent executions only (oldest evicted first)
+    if not isinstance(st.session_state.get("execution_logs"), OrderedDict):
+        st.session_state.execution_logs = OrderedDict()
+    while len(st.session_state.execution_logs) >= MAX_EXECUTIONS:
+        st.session_state.execution_logs.popitem(last=False)
+    st.session_state.execution_logs[execution_id] = deque(maxlen=MAX_LOG_LINES)
     return execution_id
 
 
 def end_execution():
     """End current execution"""
+    log_buffer.flush()
     st.session_state.current_execution_id = None
 
 
+def stream_claim_graph(initial_state: dict, progress) -> dict:
+    """Run the workflow node by node, merging each update into the final state"""
+    graph = get_claims_graph()
+    updates = queue.Queue()
+    
+    async def pump():
+        try:
+            async for event in graph.astream(initial_state, stream_mode="updates"):
+                updates.put(event)
+        finally:
+            updates.put(None)
+    
+    # The graph runs on the shared agent loop (the pooled async HTTP client is
+    # bound to it); node updates are rendered here, on the script thread
+    run = event_loop.submit(pump())
+    final_state = dict(initial_state)
+    completed = []
+    
+    # Invalid claims need no early exit here: the graph routes them straight to END
+    while (event := updates.get()) is not None:
+        for node, delta in event.items():
+            delta = dict(delta or {})
+            # Deltas are raw node returns, so apply the errors reducer (operator.add) here too
+            final_state["errors"] = final_state.get("errors", []) + delta.pop("errors", [])
+            final_state.update(delta)
+            completed.append(f"✓ {node}")
+            progress.markdown("  \n".join(completed))
+    
+    run.result()  # re-raise anything the graph raised
+    return final_state
+
+
+def _is_number(value) -> bool:
+    """int/float, but not bool"""
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def precheck_claim(claim_data: dict) -> Optional[str]:
+    """
+    Cheap structural checks on the raw claim. Returns a rejection reason, or None.
+    Only applies to claims with the invoice_items/total_amount layout.
+    """
+    items = claim_data.get("invoice_items")
+    total = claim_data.get("total_amount")
+    if not isinstance(items, list) or not _is_number(total):
+        return None
+    
+    if not items:
+        return "Claim has no invoice items"
+    
+    # Anything else (string amounts, plain-text items) is left to the LLM parser
+    if not all(isinstance(item, dict) and _is_number(item.get("amount")) for item in items):
+        return None
+    
+    items_total = sum(item["amount"] for item in items)
+    if abs(items_total - total) > 0.5 * total:
+        return f"Invoice items sum (${items_total:,.2f}) does not match total amount (${total:,.2f})"
+    
+    return None
+
+
+def _process_claim_impl(claim_data: dict) -> dict:
+    """Run one claim through the precheck and the LangGraph workflow"""
+    # Clearly invalid claims are rejected without any LLM or vector store calls
+    precheck_reason = precheck_claim(claim_data)
+    if precheck_reason:
+        logger.warning(f"⚠️ Claim rejected before workflow: {precheck_reason}")
+        return {
+            "claim_id": claim_data.get("claim_id"),
+            "is_valid": False,
+            "validation_reason": precheck_reason,
+            "final_decision": "INVALID",
+            "final_reasoning": precheck_reason,
+            "current_step": "completed"
+        }
+    
+    # Initialize state (the claim dict is passed as-is; no JSON round-trip)
+    initial_state = {
+        "claim": claim_data,
+        "current_step": "initialized"
+    }
+    
+    # Run through LangGraph, showing each node as it completes
+    logger.info("🎯 Invoking LangGraph workflow...")
+    return stream_claim_graph(initial_state, st.empty())
+
+
+class _UncachedResult(Exception):
+    """Carries a result out of _cached_process without caching it"""
+    def __init__(self, state: dict):
+        super().__init__("; ".join(state["errors"]))
+        self.state = state
+
+
+@st.cache_data(ttl=3600, show_spinner=False, max_entries=128)
+def _cached_process(claim_json_canonical: str) -> dict:
+    """Identical claims (same canonical JSON) reuse the previous result for an hour"""
+    final_state = _process_claim_impl(json.loads(claim_json_canonical))
+    # A tool failure (e.g. a transient API outage) must not be served to later resubmits
+    if final_state.get("errors"):
+        raise _UncachedResult(final_state)
+    return final_state
+
+
 def process_claim(claim_data: dict) -> dict:
     """Process claim through LangGraph workflow"""
-    # Start tracking this execution
-    start_execution()
+    # Start tracking this execution (runs on cache hits too, so the UI always gets logs)
+    execution_id = start_execution()
+    logs_token = current_execution_logs.set(st.session_state.execution_logs[execution_id])
     
-    logger.info(f"=" * 80)
-    logger.info(f"🚀 NEW CLAIM PROCESSING REQUEST")
+    logger.info(_BANNER)
+    logger.info("🚀 NEW CLAIM PROCESSING REQUEST")
     logger.info(f"Claim ID: {claim_data.get('claim_id', 'N/A')}")
-    logger.info(f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    logger.info(f"=" * 80)
+    logger.info(_BANNER)
     
     try:
-        # Convert claim data to JSON string
-        claim_json = json.dumps(claim_data)
-        
-        # Initialize state
-        initial_state = {
-            "claim_json": claim_json,
-            "current_step": "initialized"
-        }
-        
-        # Run through LangGraph
-        logger.info("🎯 Invoking LangGraph workflow...")
-        final_state = claims_graph.invoke(initial_state)
+        try:
+            final_state = _cached_process(json.dumps(claim_data, sort_keys=True))
+        except _UncachedResult as uncached:
+            logger.warning(f"⚠️ Result not cached due to tool errors: {uncached}")
+            final_state = uncached.state
         
         logger.info(f"✅ Workflow completed. Final decision: {final_state.get('final_decision', 'N/A')}")
-        logger.info(f"=" * 80)
+        logger.info(_BANNER)
         
         return final_state
     
     except Exception as e:
         logger.error(f"❌ Error processing claim: {e}")
-        logger.error(f"=" * 80)
+        logger.error(_BANNER)
         raise e
+    
+    finally:
+        # Push buffered records to the UI before the caller displays them
+        log_buffer.flush()
+        current_execution_logs.reset(logs_token)
+
+
+# Decision -> (CSS class, heading) for the result box
+_DECISION_BOXES = {
+    "APPROVED": ("success-box", "✅ CLAIM APPROVED"),
+    "DENIED": ("error-box", "❌ CLAIM DENIED"),
+    "INVALID": ("error-box", "❌ CLAIM DENIED"),
+}
+
+
+def _render_result(result: dict):
+    """Show a processed claim: logs, decision box and detailed breakdown"""
+    st.success("✅ Claim processing completed!")
+    
+    # Display logs
+    display_logs()
+    
+    # Decision box
+    decision = result.get("final_decision", "UNKNOWN")
+    reasoning = result.get("final_reasoning", "No reasoning provided")
+    box_class, heading = _DECISION_BOXES.get(decision, ("warning-box", "⚠️ REQUIRES MANUAL REVIEW"))
+    st.markdown(f'<div class="{box_class}"><h3>{heading}</h3><p>{reasoning}</p></div>', unsafe_allow_html=True)
+    
+    # Detailed breakdown
+    with st.expander("📋 View Detailed Processing Steps"):
+        st.json({
+            "claim_id": result.get("claim_id"),
+            "is_valid": result.get("is_valid"),
+            "validation_reason": result.get("validation_reason", "Valid"),
+            "policy_queries_generated": len(result.get("policy_queries", [])),
+            "recommendation": result.get("recommendation"),
+            "recommendation_reasoning": result.get("recommendation_reasoning"),
+            "price_check_result": result.get("price_check_result"),
+            "final_decision": result.get("final_decision"),
+            "final_reasoning": result.get("final_reasoning")
+        })
+
+
+def _add_item():
+    """Button callback: append an empty invoice item row"""
+    st.session_state.invoice_items.append({"item": "", "amount": 0.0})
+
+
+def _remove_item(i: int):
+    """Button callback: drop invoice item row i"""
+    st.session_state.invoice_items.pop(i)
 
 
 def main():
     """Main Streamlit application"""
     
+    # Styles must be emitted on every run: Streamlit drops elements a rerun doesn't redraw
+    st.markdown(_CSS, unsafe_allow_html=True)
+    
     # Header
     st.markdown('<div class="main-header">🏥 Insurance Claims Processing Agent</div>', unsafe_allow_html=True)
     st.markdown("---")
@@ -195,10 +424,10 @@ def main():
         st.header("📊 System Status")
         st.metric("Vector Store", "✅ Active" if st.session_state.get("vector_store_initialized") else "⏳ Loading")
         st.metric("Model", config.model_name)
-        st.metric("Policy Documents", policy_store.collection.count() if st.session_state.get("vector_store_initialized") else 0)
+        st.metric("Policy Documents", _policy_doc_count() if st.session_state.get("vector_store_initialized") else 0)
         
         st.markdown("---")
-        st.caption(f"Powered by LangChain & LangGraph")
+        st.caption("Powered by LangChain & LangGraph")
     
     # Main content area
     tab1, tab2, tab3 = st.tabs(["📝 Manual Entry", "📤 Upload JSON", "📚 Logs Viewer"])
@@ -207,45 +436,56 @@ def main():
     with tab1:
         st.subheader("Enter Claim Details Manually")
         
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            claim_id = st.text_input("Claim ID *", placeholder="e.g., CLM-2026-001")
-            policy_holder = st.text_input("Policy Holder Name *", placeholder="e.g., John Doe")
-            vendor_name = st.text_input("Vendor/Service Provider *", placeholder="e.g., AutoFix Garage")
-        
-        with col2:
-            total_amount = st.number_input("Total Claim Amount ($) *", min_value=0.0, step=10.0, value=0.0)
-        
-        st.markdown("**Invoice Items**")
-        
         # Dynamic invoice items
         if "invoice_items" not in st.session_state:
             st.session_state.invoice_items = [{"item": "", "amount": 0.0}]
         
-        for i, item in enumerate(st.session_state.invoice_items):
-            col_item, col_amount, col_remove = st.columns([3, 2, 1])
+        # Row count controls stay outside the form: they need an immediate rerun.
+        # The callbacks run before the script reruns, so the rows below are drawn once.
+        col_add, col_remove = st.columns(2)
+        
+        with col_add:
+            st.button("➕ Add Another Item", on_click=_add_item, use_container_width=True)
+        
+        with col_remove:
+            st.button(
+                "➖ Remove Last Item",
+                on_click=_remove_item,
+                args=(len(st.session_state.invoice_items) - 1,),
+                use_container_width=True,
+                disabled=len(st.session_state.invoice_items) <= 1
+            )
+        
+        # Widgets inside the form only commit (and rerun the script) on submit
+        with st.form("claim_form", clear_on_submit=False):
+            col1, col2 = st.columns(2)
             
-            with col_item:
-                item_desc = st.text_input(f"Item Description", value=item["item"], key=f"item_desc_{i}", placeholder="e.g., Engine Repair")
+            with col1:
+                claim_id = st.text_input("Claim ID *", placeholder="e.g., CLM-2026-001")
+                policy_holder = st.text_input("Policy Holder Name *", placeholder="e.g., John Doe")
+                vendor_name = st.text_input("Vendor/Service Provider *", placeholder="e.g., AutoFix Garage")
             
-            with col_amount:
-                item_amount = st.number_input(f"Amount ($)", value=item["amount"], min_value=0.0, step=10.0, key=f"item_amount_{i}")
+            with col2:
+                total_amount = st.number_input("Total Claim Amount ($) *", min_value=0.0, step=10.0, value=0.0)
             
-            with col_remove:
-                if st.button("❌", key=f"remove_{i}"):
-                    st.session_state.invoice_items.pop(i)
-                    st.rerun()
+            st.markdown("**Invoice Items**")
             
-            st.session_state.invoice_items[i] = {"item": item_desc, "amount": item_amount}
-        
-        if st.button("➕ Add Another Item"):
-            st.session_state.invoice_items.append({"item": "", "amount": 0.0})
-            st.rerun()
-        
-        st.markdown("---")
+            for i, item in enumerate(st.session_state.invoice_items):
+                col_item, col_amount = st.columns([3, 2])
+                
+                with col_item:
+                    item_desc = st.text_input("Item Description", value=item["item"], key=f"item_desc_{i}", placeholder="e.g., Engine Repair")
+                
+                with col_amount:
+                    item_amount = st.number_input("Amount ($)", value=item["amount"], min_value=0.0, step=10.0, key=f"item_amount_{i}")
+                
+                st.session_state.invoice_items[i] = {"item": item_desc, "amount": item_amount}
+            
+            st.markdown("---")
+            
+            submitted = st.form_submit_button("🚀 Process Claim", type="primary", use_container_width=True)
         
-        if st.button("🚀 Process Claim", type="primary", use_container_width=True):
+        if submitted:
             # Validate inputs
             if not claim_id or not policy_holder or not vendor_name:
                 st.error("❌ Please fill in all required fields marked with *")
@@ -269,36 +509,7 @@ def main():
                 try:
                     result = process_claim(claim_data)
                     
-                    # Display results
-                    st.success("✅ Claim processing completed!")
-                    
-                    # Display logs
-                    display_logs()
-                    
-                    # Decision box
-                    decision = result.get("final_decision", "UNKNOWN")
-                    reasoning = result.get("final_reasoning", "No reasoning provided")
-                    
-                    if decision == "APPROVED":
-                        st.markdown(f'<div class="success-box"><h3>✅ CLAIM APPROVED</h3><p>{reasoning}</p></div>', unsafe_allow_html=True)
-                    elif decision == "DENIED" or decision == "INVALID":
-                        st.markdown(f'<div class="error-box"><h3>❌ CLAIM DENIED</h3><p>{reasoning}</p></div>', unsafe_allow_html=True)
-                    else:
-                        st.markdown(f'<div class="warning-box"><h3>⚠️ REQUIRES MANUAL REVIEW</h3><p>{reasoning}</p></div>', unsafe_allow_html=True)
-                    
-                    # Detailed breakdown
-                    with st.expander("📋 View Detailed Processing Steps"):
-                        st.json({
-                            "claim_id": result.get("claim_id"),
-                            "is_valid": result.get("is_valid"),
-                            "validation_reason": result.get("validation_reason", "Valid"),
-                            "policy_queries_generated": len(result.get("policy_queries", [])),
-                            "recommendation": result.get("recommendation"),
-                            "recommendation_reasoning": result.get("recommendation_reasoning"),
-                            "price_check_result": result.get("price_check_result"),
-                            "final_decision": result.get("final_decision"),
-                            "final_reasoning": result.get("final_reasoning")
-                        })
+                    _render_result(result)
                 
                 except Exception as e:
                     st.error(f"❌ Error processing claim: {str(e)}")
@@ -313,7 +524,7 @@ def main():
         
         if uploaded_file is not None:
             try:
-                claim_data = json.load(uploaded_file)
+                claim_data = json_utils.loads(uploaded_file.getvalue())
                 
                 st.success("✅ File uploaded successfully!")
                 st.json(claim_data)
@@ -323,23 +534,7 @@ def main():
                         try:
                             result = process_claim(claim_data)
                             
-                            st.success("✅ Claim processing completed!")
-                            
-                            # Display logs
-                            display_logs()
-                            
-                            decision = result.get("final_decision", "UNKNOWN")
-                            reasoning = result.get("final_reasoning", "No reasoning provided")
-                            
-                            if decision == "APPROVED":
-                                st.markdown(f'<div class="success-box"><h3>✅ CLAIM APPROVED</h3><p>{reasoning}</p></div>', unsafe_allow_html=True)
-                            elif decision == "DENIED" or decision == "INVALID":
-                                st.markdown(f'<div class="error-box"><h3>❌ CLAIM DENIED</h3><p>{reasoning}</p></div>', unsafe_allow_html=True)
-                            else:
-                                st.markdown(f'<div class="warning-box"><h3>⚠️ REQUIRES MANUAL REVIEW</h3><p>{reasoning}</p></div>', unsafe_allow_html=True)
-                            
-                            with st.expander("📋 View Detailed Processing Steps"):
-                                st.json(result)
+                            _render_result(result)
                         
                         except Exception as e:
                             st.error(f"❌ Error processing claim: {str(e)}")
@@ -351,34 +546,33 @@ def main():
     # === TAB 3: Logs Viewer ===
     with tab3:
         st.subheader("Logs Viewer")
-
+        
         # List files from ./logs directory
-        from pathlib import Path as _Path
-        log_dir = _Path("logs")
-
+        log_dir = Path("logs")
+        
         if not log_dir.exists():
             st.info("No `logs` directory found in the workspace.")
         else:
-            files = sorted([p.name for p in log_dir.iterdir() if p.is_file()])
+            files = _list_logs()
             if not files:
                 st.info("No log files found in `./logs/`.")
             else:
                 selected = st.selectbox("Select log file", files)
-
+                
                 # Read and display the selected file
-                file_path = log_dir / selected
                 try:
-                    with open(file_path, "r", encoding="utf-8") as fh:
-                        content = fh.read()
+                    content = _read_log(selected)
                 except Exception as e:
                     st.error(f"Error reading log file: {e}")
                     content = ""
-
+                
                 if content:
                     st.download_button("Download Log File", data=content, file_name=selected, mime="text/plain")
                     st.markdown("### Log Contents")
-                    st.code(content, language="log")
-
+                    # Only the tail is rendered; the download has the full file
+                    if len(content) > MAX_LOG_DISPLAY_CHARS:
+                        st.caption(f"Showing the last {MAX_LOG_DISPLAY_CHARS:,} characters")
+                    st.code(content[-MAX_LOG_DISPLAY_CHARS:], language="log")
 
 if __name__ == "__main__":
     main()
@@ -1,57 +1,81 @@
 """Configuration management for the Insurance Claims Agent"""
-import json
 import os
+from functools import cached_property
 from pathlib import Path
 from typing import Dict, Any
 from dotenv import load_dotenv
 
+from app.utils import json_utils
+
 load_dotenv()
 
+# LangSmith tracing is off unless explicitly enabled; when it is on, callbacks
+# are flushed in the background so trace uploads never block a graph node.
+# langsmith checks the *_V2 names first, so only default when none is set.
+TRACING_ENV_VARS = ("LANGSMITH_TRACING_V2", "LANGCHAIN_TRACING_V2", "LANGSMITH_TRACING", "LANGCHAIN_TRACING")
+if not any(name in os.environ for name in TRACING_ENV_VARS):
+    os.environ["LANGCHAIN_TRACING_V2"] = "false"
+os.environ.setdefault("LANGCHAIN_CALLBACKS_BACKGROUND", "true")
+
 class Config:
-    """Application configuration"""
+    """Application configuration (each setting is resolved once, on first access)"""
     
     def __init__(self):
         # Load config.json if exists
         config_path = Path("config.json")
-        if config_path.exists():
-            with open(config_path, "r") as f:
-                self.config_data = json.load(f)
-        else:
-            self.config_data = {}
+        self.config_data = json_utils.loads(config_path.read_bytes()) if config_path.exists() else {}
     
     # API Configuration
-    @property
+    @cached_property
     def openai_api_key(self) -> str:
         return os.getenv("OPENAI_API_KEY") or self.config_data.get("API_KEY", "")
     
-    @property
+    @cached_property
     def openai_base_url(self) -> str:
         return os.getenv("OPENAI_BASE_URL") or self.config_data.get("OPENAI_API_BASE", "https://api.openai.com/v1")
     
     # Model Configuration
-    @property
+    @cached_property
     def model_name(self) -> str:
         return os.getenv("MODEL_NAME", "gpt-4o-mini")
     
-    @property
+    @cached_property
     def embedding_model(self) -> str:
         return os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
     
+    # LLM Cache Configuration
+    @cached_property
+    def llm_cache_enabled(self) -> bool:
+        return os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+    
+    @cached_property
+    def llm_cache_path(self) -> str:
+        return os.getenv("LLM_CACHE_PATH", "./llm_cache.db")
+    
+    @cached_property
+    def llm_cache_ttl(self) -> int:
+        return int(os.getenv("LLM_CACHE_TTL", "86400"))
+    
     # ChromaDB Configuration
-    @property
+    @cached_property
     def chroma_persist_directory(self) -> str:
         return os.getenv("CHROMA_PERSIST_DIR", "./chroma_db")
     
-    @property
+    @cached_property
     def chroma_collection_name(self) -> str:
         return os.getenv("CHROMA_COLLECTION", "insurance_policies")
     
+    # Visualization
+    @cached_property
+    def render_graph_png(self) -> bool:
+        return os.getenv("RENDER_GRAPH_PNG", "false").lower() == "true"
+    
     # Data paths
-    @property
+    @cached_property
     def policy_pdf_path(self) -> str:
         return os.getenv("POLICY_PDF_PATH", "./data/policy.pdf")
     
-    @property
+    @cached_property
     def coverage_csv_path(self) -> str:
         return os.getenv("COVERAGE_CSV_PATH", "./data/coveragedata.csv")
 
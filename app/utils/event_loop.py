@@ -0,0 +1,49 @@
+"""
+Process-wide asyncio event loop for graph runs.
+The shared async HTTP client keeps pooled connections bound to the loop that
+opened them, so every coroutine that uses it must run on this same loop.
+"""
+import asyncio
+import concurrent.futures
+import contextvars
+import threading
+from typing import Coroutine, Optional
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_lock = threading.Lock()
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """Return the shared loop, starting its daemon thread on first use"""
+    global _loop
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="agent-event-loop", daemon=True).start()
+        return _loop
+
+
+def submit(coro: Coroutine) -> concurrent.futures.Future:
+    """
+    Schedule a coroutine on the shared loop from any thread.
+    The task runs in a copy of the caller's context, so context variables travel with it.
+    """
+    loop = get_loop()
+    context = contextvars.copy_context()
+    future: concurrent.futures.Future = concurrent.futures.Future()
+
+    def copy_result(task: asyncio.Task):
+        if task.cancelled():
+            future.cancel()
+        elif task.exception() is not None:
+            future.set_exception(task.exception())
+        else:
+            future.set_result(task.result())
+
+    def start():
+        task = loop.create_task(coro, context=context)
+        task.add_done_callback(copy_result)
+    
+    loop.call_soon_threadsafe(start)
+    return future
+
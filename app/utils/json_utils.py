@@ -0,0 +1,16 @@
+"""JSON helpers: orjson when installed, stdlib json otherwise"""
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+    import json
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Parse JSON from bytes or str"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
@@ -0,0 +1,82 @@
+"""
+Persistent cache for LLM responses.
+Every call site runs with temperature=0, so identical (prompt, model) pairs
+return identical answers and can be served from disk instead of the API.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+from langchain_core.caches import BaseCache, RETURN_VAL_TYPE
+from langchain_core.load import dumps, loads
+
+from app.utils.logger import logger
+
+
+class SQLiteLLMCache(BaseCache):
+    """LangChain LLM cache backed by a local SQLite file with TTL expiry"""
+
+    def __init__(self, database_path: str, ttl_seconds: int = 86400):
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+
+        # One connection shared across threads; sqlite3 calls are serialized by the lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(database_path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            # Expired rows are never served again; purge them so the file doesn't grow forever
+            purged = self._conn.execute("DELETE FROM llm_cache WHERE expires_at < ?", (time.time(),)).rowcount
+
+        logger.info(f"LLM response cache ready at {database_path} (ttl={ttl_seconds}s, purged {purged} expired)")
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        """Hash the prompt together with the model configuration"""
+        payload = json.dumps({"model": llm_string, "prompt": prompt}, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        """Return cached generations, or None on a miss/expired entry"""
+        key = self._key(prompt, llm_string)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+
+        # An expired row is a miss; update() replaces it and startup purges the rest
+        if row is None or row[1] < time.time():
+            self.misses += 1
+            logger.info(f"🗄️ LLM cache MISS (hits={self.hits}, misses={self.misses})")
+            return None
+
+        self.hits += 1
+        logger.info(f"🗄️ LLM cache HIT (hits={self.hits}, misses={self.misses})")
+        return [loads(generation) for generation in json.loads(row[0])]
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        """Store generations for this prompt/model pair"""
+        key = self._key(prompt, llm_string)
+        value = json.dumps([dumps(generation) for generation in return_val])
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + self.ttl_seconds)
+            )
+
+    def clear(self, **kwargs: Any) -> None:
+        """Drop all cached responses"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM llm_cache")
+
+    # Lookups only SELECT, so they skip the default thread-pool hop; they may wait
+    # on the lock while a write commits. aupdate/aclear keep BaseCache's executor defaults.
+    async def alookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        return self.lookup(prompt, llm_string)
@@ -4,8 +4,9 @@ Logs detailed agent workflow: Request received -> Tool invocations -> Final deci
 """
 import logging
 import sys
+from contextvars import ContextVar
+from logging.handlers import TimedRotatingFileHandler
 from pathlib import Path
-from datetime import datetime
 
 # Create logs directory
 Path("logs").mkdir(exist_ok=True)
@@ -24,11 +25,13 @@ def setup_logger(name: str = "InsuranceAgent") -> logging.Logger:
     if logger.handlers:
         return logger
     
-    # File handler - daily rotating logs
-    timestamp = datetime.now().strftime("%Y%m%d")
-    file_handler = logging.FileHandler(
-        f"logs/agent_{timestamp}.log",
-        encoding="utf-8"
+    # File handler - rolls over at midnight, keeping 30 days (opened on first write)
+    file_handler = TimedRotatingFileHandler(
+        "logs/agent.log",
+        when="midnight",
+        backupCount=30,
+        encoding="utf-8",
+        delay=True
     )
     file_handler.setLevel(logging.INFO)
     
@@ -52,3 +55,8 @@ def setup_logger(name: str = "InsuranceAgent") -> logging.Logger:
 
 # Global logger instance
 logger = setup_logger()
+
+# Log buffer of the execution running in the current context (set by the UI).
+# Context variables follow the work into asyncio tasks and asyncio.to_thread
+# workers, where Streamlit's session state is not available.
+current_execution_logs: ContextVar = ContextVar("current_execution_logs", default=None)
@@ -0,0 +1,78 @@
+"""Claim precheck and result caching in the Streamlit app"""
+import json
+import operator
+from typing import Annotated, List, TypedDict
+
+import pytest
+
+pytest.importorskip("streamlit")
+pytest.importorskip("langgraph")
+
+from langgraph.graph import StateGraph, START, END
+
+from app import main
+
+
+@pytest.mark.parametrize("claim, reason", [
+    ({"invoice_items": [], "total_amount": 100}, "Claim has no invoice items"),
+    (
+        {"invoice_items": [{"item": "Bumper", "amount": 40}], "total_amount": 100},
+        "Invoice items sum ($40.00) does not match total amount ($100.00)"
+    ),
+    # T3: zero total with zero-amount items is left to the graph's validation
+    ({"invoice_items": [{"item": "Engine Work", "amount": 0.0}], "total_amount": 0.0}, None),
+    # Amounts the precheck cannot sum are left to the LLM parser
+    ({"invoice_items": [{"item": "Bumper", "amount": "40"}], "total_amount": 100}, None),
+    ({"invoice_items": [{"item": "Bumper", "amount": True}], "total_amount": 100}, None),
+    ({"invoice_items": ["Bumper repair $40"], "total_amount": 100}, None),
+    ({"invoice_items": [{"item": "Bumper", "amount": 100}], "total_amount": "100"}, None),
+])
+def test_precheck_claim(claim, reason):
+    assert main.precheck_claim(claim) == reason
+
+
+class _State(TypedDict, total=False):
+    claim: dict
+    errors: Annotated[List[str], operator.add]
+    current_step: str
+
+
+def _graph_with_failing_node(runs: list):
+    """A node that reports a tool failure, followed by one that succeeds"""
+    def failing(state):
+        runs.append("failing")
+        return {"errors": ["retrieve_policy_text: timeout"], "current_step": "policy_retrieved"}
+
+    def succeeding(state):
+        return {"errors": [], "current_step": "completed"}
+
+    builder = StateGraph(_State)
+    builder.add_node("failing", failing)
+    builder.add_node("succeeding", succeeding)
+    builder.add_edge(START, "failing")
+    builder.add_edge("failing", "succeeding")
+    builder.add_edge("succeeding", END)
+    return builder.compile()
+
+
+class _Progress:
+    def markdown(self, text):
+        pass
+
+
+def test_stream_keeps_errors_from_earlier_nodes(monkeypatch):
+    monkeypatch.setattr(main, "get_claims_graph", lambda: _graph_with_failing_node([]))
+    final_state = main.stream_claim_graph({"claim": {}, "current_step": "initialized"}, _Progress())
+    assert final_state["errors"] == ["retrieve_policy_text: timeout"]
+    assert final_state["current_step"] == "completed"
+
+
+def test_results_with_errors_are_not_cached(monkeypatch):
+    runs = []
+    monkeypatch.setattr(main, "get_claims_graph", lambda: _graph_with_failing_node(runs))
+    claim_json = json.dumps({"claim_id": "CLM-TEST-ERRORS"}, sort_keys=True)
+    for _ in range(2):
+        with pytest.raises(main._UncachedResult) as uncached:
+            main._cached_process(claim_json)
+        assert uncached.value.state["errors"]
+    assert runs == ["failing", "failing"]
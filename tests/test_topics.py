@@ -0,0 +1,55 @@
+"""Topic classification that narrows policy retrieval"""
+import asyncio
+
+import pytest
+
+pytest.importorskip("chromadb")
+pytest.importorskip("langgraph")
+
+from app.agent import graph
+from app.database.vector_store import classify_topics
+
+
+@pytest.mark.parametrize("text, topics", [
+    ("Front bumper repair", ["vehicle_damage"]),
+    ("Physiotherapy", []),
+    ("Labour", []),
+    # Whole words only: "dent" is not in "accident", "tow" is not in "towel"
+    ("Accident report fee", []),
+    ("Beach towel", []),
+    # Plurals and inflections still match
+    ("Tires", ["vehicle_damage"]),
+    ("Towing", ["vehicle_damage"]),
+    ("Hospital stay after collision", ["vehicle_damage", "medical"]),
+])
+def test_classify_topics(text, topics):
+    assert classify_topics(text) == topics
+
+
+class _RecordingTool:
+    """Stands in for retrieve_policy_text and records the topics it was given"""
+    def __init__(self):
+        self.topics = None
+
+    async def ainvoke(self, args):
+        self.topics = args["topics"]
+        return {"policy_text": ""}
+
+
+def _retrieval_topics(monkeypatch, items):
+    tool = _RecordingTool()
+    monkeypatch.setattr(graph, "retrieve_policy_text", tool)
+    asyncio.run(graph.retrieve_policy_node({
+        "policy_queries": ["coverage"],
+        "invoice_items_soa": {"item": items}
+    }))
+    return tool.topics
+
+
+def test_retrieval_filters_when_every_item_has_a_topic(monkeypatch):
+    assert _retrieval_topics(monkeypatch, ["Brake pads", "ER doctor visit"]) == ["medical", "vehicle_damage"]
+
+
+def test_retrieval_is_unfiltered_when_any_item_has_no_topic(monkeypatch):
+    # "Labour" matches no keyword, so filtering on the bumper's topic could drop its policy part
+    assert _retrieval_topics(monkeypatch, ["Bumper repair", "Labour"]) == []
@@ -0,0 +1,44 @@
+"""Section and topic tagging of policy chunks"""
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pymupdf")
+pytest.importorskip("chromadb")
+
+from app.database.vector_store import PolicyVectorStore
+
+POLICY_PDF = Path(__file__).resolve().parent.parent / "data" / "policy.pdf"
+
+
+@pytest.fixture(scope="module")
+def chunks_by_page():
+    # load_pdf_policy only reads the PDF, so no ChromaDB client is needed
+    store = PolicyVectorStore.__new__(PolicyVectorStore)
+    pages = {}
+    for chunk in store.load_pdf_policy(str(POLICY_PDF)):
+        pages.setdefault(chunk["page"], []).append((chunk["section"], chunk["topic"]))
+    return pages
+
+
+def test_part_d_endorsement_is_tagged_vehicle_damage(chunks_by_page):
+    # Page 26: Part C amendment, then the Additional Equipment endorsement
+    # that replaces the Part D insuring agreement and exclusions
+    assert chunks_by_page[26] == [
+        ("PART B", "medical"),
+        ("PART C", "uninsured_motorist"),
+        ("PART C", "uninsured_motorist"),
+        ("PART C", "uninsured_motorist"),
+        ("GENERAL", "general"),
+        ("PART D", "vehicle_damage"),
+        ("PART D", "vehicle_damage"),
+        ("PART D", "vehicle_damage"),
+    ]
+    # Page 27: the replaced Part D limit of liability, then the Pollution exclusion endorsement
+    assert chunks_by_page[27][:2] == [("PART D", "vehicle_damage")] * 2
+    assert chunks_by_page[27][2:] == [("GENERAL", "general")] * 6
+
+
+def test_main_policy_sections_carry_across_pages(chunks_by_page):
+    assert {section for section, _ in chunks_by_page[15]} == {"PART D"}
+    assert {topic for _, topic in chunks_by_page[11]} == {"uninsured_motorist"}